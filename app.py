@@ -3,13 +3,16 @@ Advanced Industrial-Grade AI Weather Prediction System
 Professional weather forecasting with Gemini AI integration
 """
 
+import html
 import streamlit as st
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
+from pathlib import Path
 from config import Config
 from weather_api import WeatherAPI
 from gemini_ai import GeminiWeatherAnalyst
-from visualizations import WeatherVisualizer
+from visualizations import WeatherForecastSoA, WeatherVisualizer
 
 # Page configuration
 st.set_page_config(
@@ -20,115 +23,12 @@ st.set_page_config(
 )
 
 # Custom CSS for industrial design
-st.markdown("""
-<style>
-    /* Main theme colors - Industrial blues and grays */
-    :root {
-        --primary-color: #1f77b4;
-        --secondary-color: #2c3e50;
-        --background-color: #f8f9fa;
-        --card-background: #ffffff;
-        --text-color: #2c3e50;
-        --border-color: #e1e4e8;
-    }
-
-    /* Header styling */
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: 700;
-        color: var(--primary-color);
-        text-align: center;
-        padding: 1rem 0;
-        margin-bottom: 2rem;
-        border-bottom: 3px solid var(--primary-color);
-    }
-
-    /* Metric cards */
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        color: white;
-        margin-bottom: 1rem;
-    }
-
-    .metric-value {
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin: 0.5rem 0;
-    }
+@st.cache_data
+def load_css():
+    """Read the stylesheet once and wrap it for injection"""
+    return f"<style>{(Path(__file__).parent / 'styles.css').read_text(encoding='utf-8')}</style>"
 
-    .metric-label {
-        font-size: 0.9rem;
-        opacity: 0.9;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-
-    /* Alert boxes */
-    .alert-box {
-        padding: 1rem;
-        border-radius: 8px;
-        margin: 1rem 0;
-        border-left: 4px solid;
-    }
-
-    .alert-high {
-        background-color: #fee;
-        border-color: #dc3545;
-        color: #721c24;
-    }
-
-    .alert-medium {
-        background-color: #fff3cd;
-        border-color: #ffc107;
-        color: #856404;
-    }
-
-    .alert-low {
-        background-color: #d1ecf1;
-        border-color: #17a2b8;
-        color: #0c5460;
-    }
-
-    /* Section headers */
-    .section-header {
-        font-size: 1.5rem;
-        font-weight: 600;
-        color: var(--secondary-color);
-        margin: 2rem 0 1rem 0;
-        padding-bottom: 0.5rem;
-        border-bottom: 2px solid var(--border-color);
-    }
-
-    /* Info box */
-    .info-box {
-        background: linear-gradient(to right, #e3f2fd, #f5f5f5);
-        padding: 1.5rem;
-        border-radius: 8px;
-        border-left: 4px solid #2196f3;
-        margin: 1rem 0;
-    }
-
-    /* Status indicator */
-    .status-indicator {
-        display: inline-block;
-        width: 10px;
-        height: 10px;
-        border-radius: 50%;
-        margin-right: 8px;
-    }
-
-    .status-ok {
-        background-color: #28a745;
-    }
-
-    .status-error {
-        background-color: #dc3545;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # Initialize session state
 if 'location' not in st.session_state:
@@ -137,6 +37,10 @@ if 'weather_data' not in st.session_state:
     st.session_state.weather_data = None
 if 'forecast_data' not in st.session_state:
     st.session_state.forecast_data = None
+if 'ai_insights' not in st.session_state:
+    st.session_state.ai_insights = {}
+if 'last_fetch' not in st.session_state:
+    st.session_state.last_fetch = None
 
 # Initialize API clients
 @st.cache_resource
@@ -150,6 +54,135 @@ def get_ai_analyst():
 weather_api = get_weather_api()
 ai_analyst = get_ai_analyst()
 
+# AI response caching
+def location_cache_key(location):
+    """Identify a place unambiguously; names alone repeat across regions (Springfield IL vs MO)"""
+    return (
+        location.get('name'),
+        location.get('region'),
+        location.get('country'),
+        location.get('lat'),
+        location.get('lon')
+    )
+
+def weather_cache_key(weather_data):
+    """Small hashable key over the current-weather fields the AI prompts use"""
+    location = weather_data.get('location', {})
+    current = weather_data.get('current', {})
+    return (
+        location_cache_key(location),
+        location.get('localtime'),
+        current.get('temp_c'),
+        current.get('condition', {}).get('text'),
+        current.get('humidity'),
+        current.get('wind_kph'),
+        current.get('pressure_mb')
+    )
+
+def forecast_cache_key(forecast_data):
+    """Small hashable key identifying a forecast payload"""
+    location = forecast_data.get('location', {})
+    forecast_days = forecast_data.get('forecast', {}).get('forecastday', [])
+    return (
+        location_cache_key(location),
+        forecast_data.get('current', {}).get('last_updated'),
+        tuple(day.get('date') for day in forecast_days)
+    )
+
+def slice_forecast(forecast_data, days):
+    """Return a view of the forecast limited to the first `days` days"""
+    forecast = forecast_data['forecast']
+    return {
+        **forecast_data,
+        'forecast': {**forecast, 'forecastday': forecast['forecastday'][:days]}
+    }
+
+@st.cache_data(ttl=Config.CACHE_TTL, show_spinner=False)
+def build_forecast_df(forecast_key, _forecast_data):
+    """Build the detailed forecast table from column lists in a single pass"""
+    forecast_days = _forecast_data['forecast']['forecastday']
+    return pd.DataFrame({
+        'Date': [day['date'] for day in forecast_days],
+        'Condition': [day['day']['condition']['text'] for day in forecast_days],
+        'Max Temp (°C)': [day['day']['maxtemp_c'] for day in forecast_days],
+        'Min Temp (°C)': [day['day']['mintemp_c'] for day in forecast_days],
+        'Precipitation (mm)': [day['day']['totalprecip_mm'] for day in forecast_days],
+        'Rain Chance (%)': [day['day']['daily_chance_of_rain'] for day in forecast_days],
+        'Max Wind (km/h)': [day['day']['maxwind_kph'] for day in forecast_days],
+        'UV Index': [day['day']['uv'] for day in forecast_days],
+        'Sunrise': [day['astro']['sunrise'] for day in forecast_days],
+        'Sunset': [day['astro']['sunset'] for day in forecast_days]
+    })
+
+@st.cache_resource(ttl=Config.CACHE_TTL, show_spinner=False)
+def get_forecast_soa(forecast_key, _forecast_data):
+    """Walk the forecast JSON once; every daily chart reads from these arrays"""
+    return WeatherForecastSoA.from_api(_forecast_data)
+
+@st.cache_resource(ttl=Config.CACHE_TTL, show_spinner=False)
+def build_forecast_figures(forecast_key, _forecast_soa):
+    """Build the daily forecast charts once per forecast and reuse them across reruns"""
+    return {
+        'temperature': WeatherVisualizer.create_temperature_chart(_forecast_soa),
+        'precipitation': WeatherVisualizer.create_precipitation_chart(_forecast_soa),
+        'wind': WeatherVisualizer.create_wind_chart(_forecast_soa),
+        'conditions': WeatherVisualizer.create_conditions_summary(_forecast_soa)
+    }
+
+@st.cache_resource(ttl=Config.CACHE_TTL, show_spinner=False)
+def build_hourly_figure(forecast_key, date, _forecast_soa):
+    """Build the hourly chart once per forecast and date"""
+    return WeatherVisualizer.create_hourly_chart(_forecast_soa, date)
+
+@st.cache_resource
+def get_ai_executor():
+    """Server-wide pool for Gemini calls; each job is a single prompt, sized for several sessions at once"""
+    return ThreadPoolExecutor(max_workers=Config.AI_MAX_WORKERS)
+
+# Each tab analysis is started in the background and cached on its own inputs,
+# so moving the days slider only re-runs the forecast analysis
+@st.cache_resource(ttl=Config.CACHE_TTL, show_spinner=False)
+def get_current_analysis(weather_key, _weather_data):
+    return get_ai_executor().submit(ai_analyst.analyze_current_weather, _weather_data)
+
+@st.cache_resource(ttl=Config.CACHE_TTL, show_spinner=False)
+def get_forecast_analysis(forecast_key, _forecast_data):
+    return get_ai_executor().submit(ai_analyst.analyze_forecast, _forecast_data)
+
+@st.cache_resource(ttl=Config.CACHE_TTL, show_spinner=False)
+def get_activity_recommendations(weather_key, _weather_data):
+    return get_ai_executor().submit(ai_analyst.get_activity_recommendations, _weather_data)
+
+# Page sections
+@st.fragment
+def location_search():
+    """Location search box; editing it reruns only this fragment until a search is made"""
+    search_query = st.text_input(
+        "Search for a location",
+        value=st.session_state.location,
+        placeholder="Enter city name..."
+    )
+
+    if st.button("🔍 Search Weather", use_container_width=True):
+        if search_query:
+            st.session_state.location = search_query
+            # Clear cached data
+            st.session_state.weather_data = None
+            st.session_state.forecast_data = None
+            st.session_state.ai_insights = {}
+            st.rerun()
+
+@st.fragment
+def hourly_section(forecast_key, forecast_soa):
+    """Hourly chart with its date picker; reruns on its own when the date changes"""
+    selected_date = st.selectbox("Select Date for Hourly Forecast", forecast_soa.date.tolist())
+
+    st.plotly_chart(
+        build_hourly_figure(forecast_key, selected_date, forecast_soa),
+        use_container_width=True,
+        key="hourly_chart"
+    )
+
 # Main header
 st.markdown('<h1 class="main-header">🌦️ Advanced AI Weather Prediction System</h1>', unsafe_allow_html=True)
 
@@ -160,12 +193,13 @@ with st.sidebar:
     # Configuration status
     config_status = Config.get_status()
     st.markdown("#### API Status")
-    for service, status in config_status.items():
-        status_class = "status-ok" if status == "Configured" else "status-error"
-        st.markdown(
-            f'<div><span class="{status_class} status-indicator"></span>{service}: {status}</div>',
-            unsafe_allow_html=True
-        )
+    st.markdown(
+        "".join(
+            f'<div><span class="{"status-ok" if status == "Configured" else "status-error"} status-indicator"></span>{service}: {status}</div>'
+            for service, status in config_status.items()
+        ),
+        unsafe_allow_html=True
+    )
 
     # Display configuration warnings if needed
     config_errors = Config.validate()
@@ -189,19 +223,7 @@ with st.sidebar:
 
     # Location search
     st.markdown("### Location Search")
-    search_query = st.text_input(
-        "Search for a location",
-        value=st.session_state.location,
-        placeholder="Enter city name..."
-    )
-
-    if st.button("🔍 Search Weather", use_container_width=True):
-        if search_query:
-            st.session_state.location = search_query
-            # Clear cached data
-            st.session_state.weather_data = None
-            st.session_state.forecast_data = None
-            st.rerun()
+    location_search()
 
     st.markdown("---")
 
@@ -233,12 +255,26 @@ with st.sidebar:
 if not config_errors:
     # Fetch weather data
     with st.spinner(f"Fetching weather data for {st.session_state.location}..."):
-        if st.session_state.weather_data is None:
-            st.session_state.weather_data = weather_api.get_current_weather(st.session_state.location)
-        if st.session_state.forecast_data is None:
-            st.session_state.forecast_data = weather_api.get_forecast(st.session_state.location, forecast_days)
+        if st.session_state.weather_data is None or st.session_state.forecast_data is None:
+            st.session_state.weather_data, st.session_state.forecast_data = weather_api.fetch_all(
+                st.session_state.location, Config.FORECAST_DAYS
+            )
+            st.session_state.last_fetch = datetime.now()
 
     if st.session_state.weather_data and st.session_state.forecast_data:
+        # The full forecast is fetched once; the slider only narrows it locally
+        forecast_data = slice_forecast(st.session_state.forecast_data, forecast_days)
+        weather_key = weather_cache_key(st.session_state.weather_data)
+        forecast_key = forecast_cache_key(forecast_data)
+
+        # Kick off the AI analyses now so they overlap with rendering below
+        ai_jobs = (
+            (get_current_analysis, weather_key, st.session_state.weather_data),
+            (get_forecast_analysis, forecast_key, forecast_data),
+            (get_activity_recommendations, weather_key, st.session_state.weather_data)
+        )
+        ai_futures = [get_analysis(key, data) for get_analysis, key, data in ai_jobs]
+
         current = st.session_state.weather_data['current']
         location = st.session_state.weather_data['location']
 
@@ -250,110 +286,78 @@ if not config_errors:
         with col2:
             st.metric("Timezone", location['tz_id'])
         with col3:
-            st.metric("Last Updated", datetime.now().strftime("%H:%M"))
+            st.metric("Last Updated", st.session_state.last_fetch.strftime("%H:%M"))
 
         # Current weather metrics
         st.markdown('<div class="section-header">Current Conditions</div>', unsafe_allow_html=True)
 
-        col1, col2, col3, col4, col5 = st.columns(5)
-
-        with col1:
-            st.metric(
-                label="Temperature",
-                value=f"{current['temp_c']}°C",
-                delta=f"Feels like {current['feelslike_c']}°C"
-            )
-
-        with col2:
-            st.metric(
-                label="Condition",
-                value=current['condition']['text']
-            )
-
-        with col3:
-            st.metric(
-                label="Humidity",
-                value=f"{current['humidity']}%"
-            )
-
-        with col4:
-            st.metric(
-                label="Wind",
-                value=f"{current['wind_kph']} km/h",
-                delta=current['wind_dir']
-            )
-
-        with col5:
-            st.metric(
-                label="Pressure",
-                value=f"{current['pressure_mb']} mb"
-            )
-
-        # Additional metrics
-        col1, col2, col3, col4 = st.columns(4)
-
-        with col1:
-            st.metric("UV Index", current['uv'])
-        with col2:
-            st.metric("Visibility", f"{current['vis_km']} km")
-        with col3:
-            st.metric("Cloud Cover", f"{current['cloud']}%")
-        with col4:
-            st.metric("Precipitation", f"{current['precip_mm']} mm")
+        # All current metrics go out as a single HTML element; API strings are escaped like st.metric did
+        metrics = [
+            ("Temperature", f"{current['temp_c']}°C", f"Feels like {current['feelslike_c']}°C"),
+            ("Condition", current['condition']['text'], ""),
+            ("Humidity", f"{current['humidity']}%", ""),
+            ("Wind", f"{current['wind_kph']} km/h", current['wind_dir']),
+            ("Pressure", f"{current['pressure_mb']} mb", ""),
+            ("UV Index", current['uv'], ""),
+            ("Visibility", f"{current['vis_km']} km", ""),
+            ("Cloud Cover", f"{current['cloud']}%", ""),
+            ("Precipitation", f"{current['precip_mm']} mm", "")
+        ]
+        st.markdown(
+            '<div class="metric-grid">' + "".join(
+                f'<div class="metric-card"><div class="metric-label">{html.escape(str(label))}</div>'
+                f'<div class="metric-value">{html.escape(str(value))}</div>'
+                f'<div class="metric-delta">{html.escape(str(delta))}</div></div>'
+                for label, value, delta in metrics
+            ) + '</div>',
+            unsafe_allow_html=True
+        )
 
         # AI Analysis Section
         st.markdown('<div class="section-header">🤖 Gemini AI Weather Analysis</div>', unsafe_allow_html=True)
 
-        tab1, tab2, tab3 = st.tabs(["Current Analysis", "7-Day Forecast", "Activity Recommendations"])
-
-        with tab1:
-            with st.spinner("Generating AI analysis..."):
-                analysis = ai_analyst.analyze_current_weather(st.session_state.weather_data)
-                st.markdown('<div class="info-box">', unsafe_allow_html=True)
-                st.markdown(analysis)
-                st.markdown('</div>', unsafe_allow_html=True)
-
-        with tab2:
-            with st.spinner("Analyzing forecast patterns..."):
-                forecast_analysis = ai_analyst.analyze_forecast(st.session_state.forecast_data)
-                st.markdown('<div class="info-box">', unsafe_allow_html=True)
-                st.markdown(forecast_analysis)
-                st.markdown('</div>', unsafe_allow_html=True)
-
-        with tab3:
-            with st.spinner("Generating activity recommendations..."):
-                recommendations = ai_analyst.get_activity_recommendations(st.session_state.weather_data)
-                st.markdown('<div class="info-box">', unsafe_allow_html=True)
-                st.markdown(recommendations)
-                st.markdown('</div>', unsafe_allow_html=True)
+        # The tabs are laid out here but filled last, so nothing below waits on Gemini
+        ai_tabs = st.tabs(["Current Analysis", "7-Day Forecast", "Activity Recommendations"])
 
         # Weather Anomalies
-        anomalies = weather_api.analyze_weather_anomalies(st.session_state.forecast_data)
+        anomalies = weather_api.analyze_weather_anomalies(forecast_data)
 
         if anomalies:
             st.markdown('<div class="section-header">⚠️ Weather Alerts & Anomalies</div>', unsafe_allow_html=True)
 
-            for anomaly in anomalies:
-                severity_class = f"alert-{anomaly['severity']}"
-                st.markdown(f"""
-                <div class="alert-box {severity_class}">
-                    <strong>{anomaly['type']}</strong> ({anomaly['date']})<br>
-                    {anomaly['description']}
-                </div>
-                """, unsafe_allow_html=True)
+            # One markdown element for all alerts instead of one per anomaly
+            alerts_html = "".join(
+                f'<div class="alert-box alert-{anomaly["severity"]}">'
+                f'<strong>{anomaly["type"]}</strong> ({anomaly["date"]})<br>'
+                f'{anomaly["description"]}'
+                '</div>'
+                for anomaly in anomalies
+            )
+            st.markdown(alerts_html, unsafe_allow_html=True)
 
             # AI insights on anomalies
             with st.expander("🤖 AI Insights on Detected Anomalies"):
-                with st.spinner("Analyzing weather anomalies..."):
-                    insights = ai_analyst.generate_weather_insights(st.session_state.weather_data, anomalies)
-                    st.markdown(insights)
+                insights_key = (weather_key, forecast_key)
+                if insights_key in st.session_state.ai_insights:
+                    st.markdown(st.session_state.ai_insights[insights_key])
+                else:
+                    # Stream the first response, then replay the stored text on later reruns;
+                    # failures are not stored so the next rerun retries
+                    insights = st.write_stream(
+                        ai_analyst.generate_weather_insights(st.session_state.weather_data, anomalies, stream=True)
+                    )
+                    if not ai_analyst.is_error(insights):
+                        st.session_state.ai_insights[insights_key] = insights
 
         # Data Visualizations
         st.markdown('<div class="section-header">📊 Weather Forecast Visualizations</div>', unsafe_allow_html=True)
 
+        forecast_soa = get_forecast_soa(forecast_key, forecast_data)
+        figures = build_forecast_figures(forecast_key, forecast_soa)
+
         # Temperature chart
         st.plotly_chart(
-            WeatherVisualizer.create_temperature_chart(st.session_state.forecast_data),
+            figures['temperature'],
             use_container_width=True,
             key="temp_chart"
         )
@@ -363,21 +367,21 @@ if not config_errors:
 
         with col1:
             st.plotly_chart(
-                WeatherVisualizer.create_precipitation_chart(st.session_state.forecast_data),
+                figures['precipitation'],
                 use_container_width=True,
                 key="precip_chart"
             )
 
         with col2:
             st.plotly_chart(
-                WeatherVisualizer.create_wind_chart(st.session_state.forecast_data),
+                figures['wind'],
                 use_container_width=True,
                 key="wind_chart"
             )
 
         # Weather conditions distribution
         st.plotly_chart(
-            WeatherVisualizer.create_conditions_summary(st.session_state.forecast_data),
+            figures['conditions'],
             use_container_width=True,
             key="conditions_chart"
         )
@@ -385,35 +389,30 @@ if not config_errors:
         # Hourly forecast
         st.markdown('<div class="section-header">⏰ Hourly Forecast</div>', unsafe_allow_html=True)
 
-        forecast_dates = [day['date'] for day in st.session_state.forecast_data['forecast']['forecastday']]
-        selected_date = st.selectbox("Select Date for Hourly Forecast", forecast_dates)
-
-        st.plotly_chart(
-            WeatherVisualizer.create_hourly_chart(st.session_state.forecast_data, selected_date),
-            use_container_width=True,
-            key="hourly_chart"
-        )
+        hourly_section(forecast_key, forecast_soa)
 
         # Detailed forecast table
         with st.expander("📋 Detailed 7-Day Forecast Table"):
-            forecast_table = []
-            for day in st.session_state.forecast_data['forecast']['forecastday']:
-                forecast_table.append({
-                    'Date': day['date'],
-                    'Condition': day['day']['condition']['text'],
-                    'Max Temp (°C)': day['day']['maxtemp_c'],
-                    'Min Temp (°C)': day['day']['mintemp_c'],
-                    'Precipitation (mm)': day['day']['totalprecip_mm'],
-                    'Rain Chance (%)': day['day']['daily_chance_of_rain'],
-                    'Max Wind (km/h)': day['day']['maxwind_kph'],
-                    'UV Index': day['day']['uv'],
-                    'Sunrise': day['astro']['sunrise'],
-                    'Sunset': day['astro']['sunset']
-                })
-
-            df = pd.DataFrame(forecast_table)
+            df = build_forecast_df(forecast_key, forecast_data)
             st.dataframe(df, use_container_width=True, hide_index=True)
 
+        # Fill the AI tabs once everything else is on screen
+        for tab, future, (get_analysis, key, data) in zip(ai_tabs, ai_futures, ai_jobs):
+            with tab:
+                try:
+                    with st.spinner("Generating AI analysis..."):
+                        analysis = future.result(timeout=Config.AI_RESULT_TIMEOUT)
+                except FutureTimeoutError:
+                    # The job keeps running in the cached Future; a later rerun picks it up
+                    st.info("AI analysis is taking longer than usual. Refresh shortly to see it.")
+                    continue
+                if ai_analyst.is_error(analysis):
+                    # Drop the failed Future so a transient error is retried instead of served to everyone
+                    get_analysis.clear(key, data)
+                st.markdown('<div class="info-box">', unsafe_allow_html=True)
+                st.markdown(analysis)
+                st.markdown('</div>', unsafe_allow_html=True)
+
     else:
         st.error(f"Unable to fetch weather data for '{st.session_state.location}'. Please check the location name and try again.")
         st.info("Try searching for a different location using the sidebar.")
@@ -4,6 +4,8 @@ Handles environment variables and application settings
 """
 
 import os
+from functools import lru_cache
+from types import MappingProxyType
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -18,7 +20,7 @@ class Config:
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
     
     # API Endpoints
-    WEATHER_API_BASE_URL = "http://api.weatherapi.com/v1"
+    WEATHER_API_BASE_URL = "https://api.weatherapi.com/v1"
     
     # Application Settings
     DEFAULT_LOCATION = "London"
@@ -29,13 +31,18 @@ class Config:
     GEMINI_MODEL = "gemini-2.0-flash-exp"
     GEMINI_TEMPERATURE = 0.2
     GEMINI_MAX_TOKENS = 1000
+    AI_MAX_WORKERS = 16  # Gemini calls in flight across all sessions
+    AI_RESULT_TIMEOUT = 60  # seconds to wait for an analysis before rendering without it
     
     # Weather Alert Thresholds
     TEMP_ANOMALY_THRESHOLD = 5  # degrees Celsius
     WIND_SPEED_ALERT = 50  # km/h
     PRECIPITATION_ALERT = 50  # mm
+    UV_INDEX_ALERT = 8  # UV index
     
+    # Environment is only read at import time, so both checks are computed once
     @staticmethod
+    @lru_cache(maxsize=1)
     def validate():
         """Validate configuration"""
         errors = []
@@ -46,12 +53,13 @@ class Config:
         if not Config.GEMINI_API_KEY or Config.GEMINI_API_KEY == 'your_gemini_api_key_here':
             errors.append("GEMINI_API_KEY is not configured")
         
-        return errors
+        return tuple(errors)
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_status():
-        """Get configuration status"""
-        return {
+        """Get configuration status (read-only, as the cached mapping is shared)"""
+        return MappingProxyType({
             "Weather API": "Configured" if Config.WEATHERAPI_KEY and Config.WEATHERAPI_KEY != 'your_weatherapi_key_here' else "Not Configured",
             "Gemini AI": "Configured" if Config.GEMINI_API_KEY and Config.GEMINI_API_KEY != 'your_gemini_api_key_here' else "Not Configured"
-        }
+        })
@@ -4,27 +4,59 @@ Handles intelligent weather analysis using Google Gemini AI
 """
 
 import google.generativeai as genai
-from typing import Dict, List, Optional
-import json
+from typing import Dict, Iterator, List, Optional, Union
+import orjson
 from config import Config
 
 class GeminiWeatherAnalyst:
     """Gemini AI-powered weather analyst"""
     
+    GENERATION_CONFIG = {
+        "temperature": Config.GEMINI_TEMPERATURE,
+        "max_output_tokens": Config.GEMINI_MAX_TOKENS,
+    }
+    
+    # Every failure message returned (or streamed) by the analyst starts with this
+    ERROR_PREFIX = "Error generating"
+    
     def __init__(self):
         """Initialize Gemini AI client"""
         if Config.GEMINI_API_KEY:
-            genai.configure(api_key=Config.GEMINI_API_KEY)
+            # gRPC keeps one persistent HTTP/2 channel shared by every call
+            genai.configure(api_key=Config.GEMINI_API_KEY, transport='grpc')
             self.model = genai.GenerativeModel(
                 model_name=Config.GEMINI_MODEL,
-                generation_config={
-                    "temperature": Config.GEMINI_TEMPERATURE,
-                    "max_output_tokens": Config.GEMINI_MAX_TOKENS,
-                }
+                generation_config=GeminiWeatherAnalyst.GENERATION_CONFIG
             )
         else:
             self.model = None
     
+    @staticmethod
+    def is_error(text: str) -> bool:
+        """Whether a reply is, or was cut off by, a failure message"""
+        return GeminiWeatherAnalyst.ERROR_PREFIX in text
+    
+    @staticmethod
+    def _reply(text: str, stream: bool) -> Union[str, Iterator[str]]:
+        """Return a fixed message in the shape the caller asked for"""
+        return iter([text]) if stream else text
+    
+    def _generate(self, prompt: str, stream: bool, error_message: str) -> Union[str, Iterator[str]]:
+        """Send a prompt to Gemini, either blocking for the full text or streaming chunks"""
+        if stream:
+            return self._stream_content(prompt, error_message)
+        
+        response = self.model.generate_content(prompt)
+        return response.text
+    
+    def _stream_content(self, prompt: str, error_message: str) -> Iterator[str]:
+        """Yield response text as Gemini generates it"""
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                yield chunk.text
+        except Exception as e:
+            yield f"{error_message}: {str(e)}"
+    
     def analyze_current_weather(self, weather_data: Dict) -> str:
         """
         Analyze current weather conditions using Gemini AI
@@ -41,21 +73,34 @@ class GeminiWeatherAnalyst:
         try:
             current = weather_data.get('current', {})
             location = weather_data.get('location', {})
+            name = location.get('name')
+            country = location.get('country')
+            localtime = location.get('localtime')
+            temp = current.get('temp_c')
+            feels_like = current.get('feelslike_c')
+            condition = current.get('condition', {}).get('text')
+            humidity = current.get('humidity')
+            wind = current.get('wind_kph')
+            wind_dir = current.get('wind_dir')
+            pressure = current.get('pressure_mb')
+            visibility = current.get('vis_km')
+            uv = current.get('uv')
+            cloud = current.get('cloud')
             
             prompt = f"""You are a professional meteorologist analyzing current weather conditions.
 
-Location: {location.get('name')}, {location.get('country')}
-Local Time: {location.get('localtime')}
+Location: {name}, {country}
+Local Time: {localtime}
 
 Current Conditions:
-- Temperature: {current.get('temp_c')}°C (Feels like: {current.get('feelslike_c')}°C)
-- Condition: {current.get('condition', {}).get('text')}
-- Humidity: {current.get('humidity')}%
-- Wind: {current.get('wind_kph')} km/h {current.get('wind_dir')}
-- Pressure: {current.get('pressure_mb')} mb
-- Visibility: {current.get('vis_km')} km
-- UV Index: {current.get('uv')}
-- Cloud Cover: {current.get('cloud')}%
+- Temperature: {temp}°C (Feels like: {feels_like}°C)
+- Condition: {condition}
+- Humidity: {humidity}%
+- Wind: {wind} km/h {wind_dir}
+- Pressure: {pressure} mb
+- Visibility: {visibility} km
+- UV Index: {uv}
+- Cloud Cover: {cloud}%
 
 Provide a professional weather analysis covering:
 1. Current conditions summary
@@ -87,6 +132,8 @@ Keep the analysis concise, practical, and professional (3-4 paragraphs maximum).
         try:
             forecast_days = forecast_data.get('forecast', {}).get('forecastday', [])
             location = forecast_data.get('location', {})
+            name = location.get('name')
+            country = location.get('country')
             
             # Prepare forecast summary
             forecast_summary = []
@@ -104,10 +151,10 @@ Keep the analysis concise, practical, and professional (3-4 paragraphs maximum).
             
             prompt = f"""You are a professional meteorologist providing a comprehensive 7-day weather forecast analysis.
 
-Location: {location.get('name')}, {location.get('country')}
+Location: {name}, {country}
 
 7-Day Forecast:
-{json.dumps(forecast_summary, indent=2)}
+{orjson.dumps(forecast_summary, option=orjson.OPT_INDENT_2).decode()}
 
 Provide a detailed forecast analysis covering:
 1. Week overview and general weather trends
@@ -125,23 +172,28 @@ Keep the analysis informative, actionable, and professional (4-5 paragraphs maxi
         except Exception as e:
             return f"Error generating forecast analysis: {str(e)}"
     
-    def generate_weather_insights(self, weather_data: Dict, anomalies: List[Dict]) -> str:
+    def generate_weather_insights(self, weather_data: Dict, anomalies: List[Dict], stream: bool = False) -> Union[str, Iterator[str]]:
         """
         Generate comprehensive weather insights
         
         Args:
             weather_data: Complete weather data
             anomalies: List of detected anomalies
+            stream: Yield text chunks as they are generated
             
         Returns:
             AI-generated insights
         """
         if not self.model:
-            return "Gemini AI not configured. Please add your API key to enable AI insights."
+            return self._reply("Gemini AI not configured. Please add your API key to enable AI insights.", stream)
         
         try:
             current = weather_data.get('current', {})
             location = weather_data.get('location', {})
+            name = location.get('name')
+            country = location.get('country')
+            temp = current.get('temp_c')
+            condition = current.get('condition', {}).get('text')
             
             anomaly_summary = "\n".join([
                 f"- {a['type']}: {a['description']} (Severity: {a['severity']})"
@@ -150,9 +202,9 @@ Keep the analysis informative, actionable, and professional (4-5 paragraphs maxi
             
             prompt = f"""You are a weather intelligence analyst providing expert insights.
 
-Location: {location.get('name')}, {location.get('country')}
-Current Temperature: {current.get('temp_c')}°C
-Current Condition: {current.get('condition', {}).get('text')}
+Location: {name}, {country}
+Current Temperature: {temp}°C
+Current Condition: {condition}
 
 Detected Weather Anomalies:
 {anomaly_summary}
@@ -166,11 +218,10 @@ Provide expert weather insights covering:
 
 Be concise, actionable, and focus on practical guidance (3-4 paragraphs)."""
 
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self._generate(prompt, stream, "Error generating insights")
             
         except Exception as e:
-            return f"Error generating insights: {str(e)}"
+            return self._reply(f"Error generating insights: {str(e)}", stream)
     
     def get_activity_recommendations(self, weather_data: Dict) -> str:
         """
@@ -187,14 +238,19 @@ Be concise, actionable, and focus on practical guidance (3-4 paragraphs)."""
         
         try:
             current = weather_data.get('current', {})
+            temp = current.get('temp_c')
+            condition = current.get('condition', {}).get('text')
+            wind = current.get('wind_kph')
+            uv = current.get('uv')
+            humidity = current.get('humidity')
             
             prompt = f"""Based on these current weather conditions, suggest 5 suitable activities:
 
-Temperature: {current.get('temp_c')}°C
-Condition: {current.get('condition', {}).get('text')}
-Wind: {current.get('wind_kph')} km/h
-UV Index: {current.get('uv')}
-Humidity: {current.get('humidity')}%
+Temperature: {temp}°C
+Condition: {condition}
+Wind: {wind} km/h
+UV Index: {uv}
+Humidity: {humidity}%
 
 Provide 5 specific, practical activity recommendations that are well-suited for these conditions.
 Format: Brief activity name followed by 1-sentence explanation.
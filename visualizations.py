@@ -5,10 +5,69 @@ Professional charts and visualizations for weather data
 
 import plotly.graph_objects as go
 import plotly.express as px
-from plotly.subplots import make_subplots
+import plotly.io as pio
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
 from datetime import datetime
+from config import Config
+
+# Serialize figures with orjson (st.plotly_chart goes through plotly.io.to_json)
+pio.json.config.default_engine = 'orjson'
+
+
+@dataclass(frozen=True)
+class WeatherForecastSoA:
+    """Daily forecast fields stored as one NumPy array per field (struct-of-arrays)"""
+    
+    date: np.ndarray
+    maxtemp_c: np.ndarray
+    mintemp_c: np.ndarray
+    avgtemp_c: np.ndarray
+    totalprecip_mm: np.ndarray
+    daily_chance_of_rain: np.ndarray
+    maxwind_kph: np.ndarray
+    uv: np.ndarray
+    condition: np.ndarray
+    days_by_date: Dict[str, Dict]
+    
+    @classmethod
+    def from_api(cls, forecast_data: Dict) -> Optional['WeatherForecastSoA']:
+        """
+        Build the column arrays from a forecast payload in a single pass
+        
+        Args:
+            forecast_data: Forecast data from API
+            
+        Returns:
+            WeatherForecastSoA, or None if there is no forecast
+        """
+        if not forecast_data or 'forecast' not in forecast_data:
+            return None
+        
+        forecast_days = forecast_data['forecast']['forecastday']
+        days = [day['day'] for day in forecast_days]
+        
+        # One walk over the days into a (fields x days) matrix; each row is a view.
+        # float32 is ample for weather readings and halves the serialized chart payload.
+        numeric = np.array(
+            [
+                (day['maxtemp_c'], day['mintemp_c'], day['avgtemp_c'], day['totalprecip_mm'],
+                 day['daily_chance_of_rain'], day['maxwind_kph'], day.get('uv', 0))
+                for day in days
+            ],
+            dtype=np.float32
+        ).reshape(len(days), 7).T
+        
+        return cls(
+            np.array([day['date'] for day in forecast_days]),
+            *numeric,
+            condition=np.array([day['condition']['text'] for day in days]),
+            days_by_date={day['date']: day for day in forecast_days}
+        )
+
 
 class WeatherVisualizer:
     """Create professional weather visualizations"""
@@ -25,323 +84,284 @@ class WeatherVisualizer:
         'grid': '#e1e4e8'
     }
     
+    # Layout pieces shared by every chart, built once
+    _GRID = dict(showgrid=True, gridwidth=1, gridcolor=COLORS['grid'])
+    _LEGEND = dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    _MARGIN = dict(l=50, r=50, t=80, b=50)
+    _BASE_LAYOUT = dict(font=dict(size=12), margin=_MARGIN)
+    _CHART_LAYOUT = dict(hovermode='x unified', plot_bgcolor='white', paper_bgcolor='white', **_BASE_LAYOUT)
+    
+    @staticmethod
+    def _new_fig(data: List = None, layout: Dict = None, secondary_y: bool = False) -> go.Figure:
+        """
+        Build a figure in one shot, skipping Plotly's property validation
+        
+        Args:
+            data: Traces for the figure
+            layout: Complete layout for the figure
+            secondary_y: Add a right-hand y-axis (traces opt in with yaxis='y2')
+            
+        Returns:
+            Plotly figure object
+        """
+        layout = layout or {}
+        
+        if secondary_y:
+            # Same axis arrangement make_subplots uses for a secondary y-axis
+            layout = {
+                **layout,
+                'xaxis': {'domain': [0.0, 0.94], 'anchor': 'y', **layout.get('xaxis', {})},
+                'yaxis': {'anchor': 'x', **layout.get('yaxis', {})},
+                'yaxis2': {'anchor': 'x', 'overlaying': 'y', 'side': 'right', **layout.get('yaxis2', {})}
+            }
+        
+        return go.Figure(data=data, layout=layout, _validate=False)
+    
     @staticmethod
-    def create_temperature_chart(forecast_data: Dict) -> go.Figure:
+    def create_temperature_chart(forecast: WeatherForecastSoA) -> go.Figure:
         """
         Create temperature forecast chart
         
         Args:
-            forecast_data: Forecast data from API
+            forecast: Daily forecast arrays
             
         Returns:
             Plotly figure object
         """
-        if not forecast_data or 'forecast' not in forecast_data:
+        if forecast is None:
             return go.Figure()
         
-        forecast_days = forecast_data['forecast']['forecastday']
-        
-        dates = [day['date'] for day in forecast_days]
-        max_temps = [day['day']['maxtemp_c'] for day in forecast_days]
-        min_temps = [day['day']['mintemp_c'] for day in forecast_days]
-        avg_temps = [day['day']['avgtemp_c'] for day in forecast_days]
-        
-        fig = go.Figure()
-        
-        # Add temperature traces
-        fig.add_trace(go.Scatter(
-            x=dates, y=max_temps,
-            mode='lines+markers',
-            name='Max Temperature',
-            line=dict(color=WeatherVisualizer.COLORS['danger'], width=2),
-            marker=dict(size=8)
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=dates, y=avg_temps,
-            mode='lines+markers',
-            name='Avg Temperature',
-            line=dict(color=WeatherVisualizer.COLORS['primary'], width=2),
-            marker=dict(size=8)
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=dates, y=min_temps,
-            mode='lines+markers',
-            name='Min Temperature',
-            line=dict(color=WeatherVisualizer.COLORS['info'], width=2),
-            marker=dict(size=8)
-        ))
+        dates = forecast.date
+        max_temps = forecast.maxtemp_c
+        min_temps = forecast.mintemp_c
+        avg_temps = forecast.avgtemp_c
         
-        fig.update_layout(
-            title='7-Day Temperature Forecast',
-            xaxis_title='Date',
-            yaxis_title='Temperature (°C)',
-            hovermode='x unified',
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(size=12),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
+        # Temperature traces
+        traces = [
+            go.Scatter(
+                x=dates, y=max_temps,
+                mode='lines+markers',
+                name='Max Temperature',
+                line=dict(color=WeatherVisualizer.COLORS['danger'], width=2),
+                marker=dict(size=8),
+                _validate=False
             ),
-            margin=dict(l=50, r=50, t=80, b=50)
-        )
-        
-        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor=WeatherVisualizer.COLORS['grid'])
-        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor=WeatherVisualizer.COLORS['grid'])
-        
-        return fig
+            go.Scatter(
+                x=dates, y=avg_temps,
+                mode='lines+markers',
+                name='Avg Temperature',
+                line=dict(color=WeatherVisualizer.COLORS['primary'], width=2),
+                marker=dict(size=8),
+                _validate=False
+            ),
+            go.Scatter(
+                x=dates, y=min_temps,
+                mode='lines+markers',
+                name='Min Temperature',
+                line=dict(color=WeatherVisualizer.COLORS['info'], width=2),
+                marker=dict(size=8),
+                _validate=False
+            )
+        ]
+        
+        return WeatherVisualizer._new_fig(traces, dict(
+            title=dict(text='7-Day Temperature Forecast'),
+            xaxis=dict(title=dict(text='Date'), **WeatherVisualizer._GRID),
+            yaxis=dict(title=dict(text='Temperature (°C)'), **WeatherVisualizer._GRID),
+            legend=WeatherVisualizer._LEGEND,
+            **WeatherVisualizer._CHART_LAYOUT
+        ))
     
     @staticmethod
-    def create_precipitation_chart(forecast_data: Dict) -> go.Figure:
+    def create_precipitation_chart(forecast: WeatherForecastSoA) -> go.Figure:
         """
         Create precipitation forecast chart
         
         Args:
-            forecast_data: Forecast data from API
+            forecast: Daily forecast arrays
             
         Returns:
             Plotly figure object
         """
-        if not forecast_data or 'forecast' not in forecast_data:
+        if forecast is None:
             return go.Figure()
         
-        forecast_days = forecast_data['forecast']['forecastday']
-        
-        dates = [day['date'] for day in forecast_days]
-        precipitation = [day['day']['totalprecip_mm'] for day in forecast_days]
-        rain_chance = [day['day']['daily_chance_of_rain'] for day in forecast_days]
+        dates = forecast.date
+        precipitation = forecast.totalprecip_mm
+        rain_chance = forecast.daily_chance_of_rain
         
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        # Precipitation bars
-        fig.add_trace(
+        traces = [
+            # Precipitation bars
             go.Bar(
                 x=dates,
                 y=precipitation,
                 name='Precipitation (mm)',
                 marker_color=WeatherVisualizer.COLORS['primary'],
-                opacity=0.7
+                opacity=0.7,
+                _validate=False
             ),
-            secondary_y=False
-        )
-        
-        # Rain chance line
-        fig.add_trace(
+            # Rain chance line
             go.Scatter(
                 x=dates,
                 y=rain_chance,
                 name='Chance of Rain (%)',
                 line=dict(color=WeatherVisualizer.COLORS['danger'], width=2),
-                marker=dict(size=8)
-            ),
-            secondary_y=True
-        )
-        
-        fig.update_layout(
-            title='Precipitation Forecast',
-            hovermode='x unified',
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(size=12),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            margin=dict(l=50, r=50, t=80, b=50)
-        )
-        
-        fig.update_xaxes(title_text="Date", showgrid=True, gridwidth=1, gridcolor=WeatherVisualizer.COLORS['grid'])
-        fig.update_yaxes(title_text="Precipitation (mm)", secondary_y=False, showgrid=True, gridwidth=1, gridcolor=WeatherVisualizer.COLORS['grid'])
-        fig.update_yaxes(title_text="Chance of Rain (%)", secondary_y=True)
-        
-        return fig
+                marker=dict(size=8),
+                yaxis='y2',
+                _validate=False
+            )
+        ]
+        
+        return WeatherVisualizer._new_fig(traces, dict(
+            title=dict(text='Precipitation Forecast'),
+            xaxis=dict(title=dict(text="Date"), **WeatherVisualizer._GRID),
+            yaxis=dict(title=dict(text="Precipitation (mm)"), **WeatherVisualizer._GRID),
+            yaxis2=dict(title=dict(text="Chance of Rain (%)")),
+            legend=WeatherVisualizer._LEGEND,
+            **WeatherVisualizer._CHART_LAYOUT
+        ), secondary_y=True)
     
     @staticmethod
-    def create_wind_chart(forecast_data: Dict) -> go.Figure:
+    def create_wind_chart(forecast: WeatherForecastSoA) -> go.Figure:
         """
         Create wind speed forecast chart
         
         Args:
-            forecast_data: Forecast data from API
+            forecast: Daily forecast arrays
             
         Returns:
             Plotly figure object
         """
-        if not forecast_data or 'forecast' not in forecast_data:
+        if forecast is None:
             return go.Figure()
         
-        forecast_days = forecast_data['forecast']['forecastday']
-        
-        dates = [day['date'] for day in forecast_days]
-        max_wind = [day['day']['maxwind_kph'] for day in forecast_days]
+        dates = forecast.date
+        max_wind = forecast.maxwind_kph
         
-        fig = go.Figure()
-        
-        fig.add_trace(go.Bar(
-            x=dates,
-            y=max_wind,
-            name='Max Wind Speed',
-            marker=dict(
-                color=max_wind,
-                colorscale='Blues',
-                showscale=True,
-                colorbar=dict(title="km/h")
+        traces = [
+            go.Bar(
+                x=dates,
+                y=max_wind,
+                name='Max Wind Speed',
+                # Bars above the alert line are flagged in red
+                marker_color=np.where(
+                    max_wind > Config.WIND_SPEED_ALERT,
+                    WeatherVisualizer.COLORS['danger'],
+                    WeatherVisualizer.COLORS['primary']
+                ).tolist(),
+                _validate=False
             )
+        ]
+        
+        fig = WeatherVisualizer._new_fig(traces, dict(
+            title=dict(text='Wind Speed Forecast'),
+            xaxis=dict(title=dict(text='Date'), **WeatherVisualizer._GRID),
+            yaxis=dict(title=dict(text='Wind Speed (km/h)'), **WeatherVisualizer._GRID),
+            **WeatherVisualizer._CHART_LAYOUT
         ))
         
         # Add warning line at threshold
         fig.add_hline(
-            y=50,
+            y=Config.WIND_SPEED_ALERT,
             line_dash="dash",
             line_color=WeatherVisualizer.COLORS['danger'],
             annotation_text="High Wind Alert"
         )
         
-        fig.update_layout(
-            title='Wind Speed Forecast',
-            xaxis_title='Date',
-            yaxis_title='Wind Speed (km/h)',
-            hovermode='x unified',
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(size=12),
-            margin=dict(l=50, r=50, t=80, b=50)
-        )
-        
-        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor=WeatherVisualizer.COLORS['grid'])
-        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor=WeatherVisualizer.COLORS['grid'])
-        
         return fig
     
     @staticmethod
-    def create_conditions_summary(forecast_data: Dict) -> go.Figure:
+    def create_conditions_summary(forecast: WeatherForecastSoA) -> go.Figure:
         """
         Create weather conditions summary visualization
         
         Args:
-            forecast_data: Forecast data from API
+            forecast: Daily forecast arrays
             
         Returns:
             Plotly figure object
         """
-        if not forecast_data or 'forecast' not in forecast_data:
+        if forecast is None:
             return go.Figure()
         
-        forecast_days = forecast_data['forecast']['forecastday']
-        
         # Count weather conditions
-        conditions = {}
-        for day in forecast_days:
-            condition = day['day']['condition']['text']
-            conditions[condition] = conditions.get(condition, 0) + 1
-        
-        fig = go.Figure(data=[go.Pie(
-            labels=list(conditions.keys()),
-            values=list(conditions.values()),
-            hole=0.4,
-            marker=dict(colors=px.colors.qualitative.Set3)
-        )])
-        
-        fig.update_layout(
-            title='Weather Conditions Distribution (7 Days)',
-            annotations=[dict(text='Conditions', x=0.5, y=0.5, font_size=14, showarrow=False)],
-            font=dict(size=12),
-            margin=dict(l=50, r=50, t=80, b=50)
-        )
+        conditions = Counter(forecast.condition.tolist())
+        
+        traces = [
+            go.Pie(
+                labels=list(conditions.keys()),
+                values=list(conditions.values()),
+                hole=0.4,
+                marker=dict(colors=px.colors.qualitative.Set3),
+                _validate=False
+            )
+        ]
         
-        return fig
+        return WeatherVisualizer._new_fig(traces, dict(
+            title=dict(text='Weather Conditions Distribution (7 Days)'),
+            annotations=[dict(text='Conditions', x=0.5, y=0.5, font=dict(size=14), showarrow=False)],
+            **WeatherVisualizer._BASE_LAYOUT
+        ))
     
     @staticmethod
-    def create_hourly_chart(forecast_data: Dict, date: str) -> go.Figure:
+    def create_hourly_chart(forecast: WeatherForecastSoA, date: str) -> go.Figure:
         """
         Create hourly forecast chart for a specific date
         
         Args:
-            forecast_data: Forecast data from API
+            forecast: Daily forecast arrays
             date: Date string (YYYY-MM-DD)
             
         Returns:
             Plotly figure object
         """
-        if not forecast_data or 'forecast' not in forecast_data:
+        if forecast is None:
             return go.Figure()
         
-        # Find the day's data
-        day_data = None
-        for day in forecast_data['forecast']['forecastday']:
-            if day['date'] == date:
-                day_data = day
-                break
+        day_data = forecast.days_by_date.get(date)
         
         if not day_data or 'hour' not in day_data:
             return go.Figure()
         
         hours = day_data['hour']
-        times = [h['time'].split(' ')[1] for h in hours]
-        temps = [h['temp_c'] for h in hours]
-        feels_like = [h['feelslike_c'] for h in hours]
-        precip = [h['precip_mm'] for h in hours]
-        
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        # Temperature traces
-        fig.add_trace(
-            go.Scatter(
+        # Plotly takes datetime64 directly; the axis formats it back to HH:MM
+        times = np.array([h['time'] for h in hours], dtype='datetime64[m]')
+        temps = np.fromiter((h['temp_c'] for h in hours), dtype=np.float32, count=len(hours))
+        feels_like = np.fromiter((h['feelslike_c'] for h in hours), dtype=np.float32, count=len(hours))
+        precip = np.fromiter((h['precip_mm'] for h in hours), dtype=np.float32, count=len(hours))
+        
+        traces = [
+            # Temperature traces, rendered with WebGL
+            go.Scattergl(
                 x=times, y=temps,
                 mode='lines+markers',
                 name='Temperature',
-                line=dict(color=WeatherVisualizer.COLORS['primary'], width=2)
+                line=dict(color=WeatherVisualizer.COLORS['primary'], width=2),
+                _validate=False
             ),
-            secondary_y=False
-        )
-        
-        fig.add_trace(
-            go.Scatter(
+            go.Scattergl(
                 x=times, y=feels_like,
                 mode='lines',
                 name='Feels Like',
-                line=dict(color=WeatherVisualizer.COLORS['secondary'], width=1, dash='dash')
+                line=dict(color=WeatherVisualizer.COLORS['secondary'], width=1, dash='dash'),
+                _validate=False
             ),
-            secondary_y=False
-        )
-        
-        # Precipitation bars
-        fig.add_trace(
+            # Precipitation bars
             go.Bar(
                 x=times, y=precip,
                 name='Precipitation',
                 marker_color=WeatherVisualizer.COLORS['info'],
-                opacity=0.3
-            ),
-            secondary_y=True
-        )
-        
-        fig.update_layout(
-            title=f'Hourly Forecast for {date}',
-            hovermode='x unified',
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            font=dict(size=12),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            ),
-            margin=dict(l=50, r=50, t=80, b=50)
-        )
-        
-        fig.update_xaxes(title_text="Hour", showgrid=True, gridwidth=1, gridcolor=WeatherVisualizer.COLORS['grid'])
-        fig.update_yaxes(title_text="Temperature (°C)", secondary_y=False, showgrid=True, gridwidth=1, gridcolor=WeatherVisualizer.COLORS['grid'])
-        fig.update_yaxes(title_text="Precipitation (mm)", secondary_y=True)
-        
-        return fig
+                opacity=0.3,
+                yaxis='y2',
+                _validate=False
+            )
+        ]
+        
+        return WeatherVisualizer._new_fig(traces, dict(
+            title=dict(text=f'Hourly Forecast for {date}'),
+            xaxis=dict(title=dict(text="Hour"), tickformat='%H:%M', hoverformat='%H:%M', **WeatherVisualizer._GRID),
+            yaxis=dict(title=dict(text="Temperature (°C)"), **WeatherVisualizer._GRID),
+            yaxis2=dict(title=dict(text="Precipitation (mm)")),
+            legend=WeatherVisualizer._LEGEND,
+            **WeatherVisualizer._CHART_LAYOUT
+        ), secondary_y=True)
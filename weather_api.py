@@ -3,17 +3,156 @@ Weather API Module
 Handles all interactions with WeatherAPI.com
 """
 
-import requests
-from typing import Dict, List, Optional
+import logging
+import time
+import httpx
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import numpy as np
+import orjson
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+# Forecast fields the dashboard actually reads; everything else is dropped before caching
+_FORECAST_DAY_KEEP = {'date', 'day', 'astro', 'hour'}
+_DAY_KEEP = {'maxtemp_c', 'mintemp_c', 'avgtemp_c', 'totalprecip_mm', 'daily_chance_of_rain',
+             'maxwind_kph', 'uv', 'condition'}
+_HOUR_KEEP = {'time', 'temp_c', 'feelslike_c', 'precip_mm'}
+
+
+def _prune_forecast(forecast_data: Dict) -> Dict:
+    """
+    Strip unused fields from a forecast payload
+    
+    Args:
+        forecast_data: Forecast data from API
+        
+    Returns:
+        Forecast data with only the fields used downstream
+    """
+    forecast = forecast_data.get('forecast')
+    if not forecast:
+        return forecast_data
+    
+    forecast['forecastday'] = [
+        {
+            **{key: value for key, value in day.items() if key in _FORECAST_DAY_KEEP},
+            'day': {key: value for key, value in day['day'].items() if key in _DAY_KEEP},
+            'hour': [
+                {key: value for key, value in hour.items() if key in _HOUR_KEEP}
+                for hour in day.get('hour', [])
+            ]
+        }
+        for day in forecast['forecastday']
+    ]
+    return forecast_data
+
+
+def _scan_anomalies(temps: np.ndarray, wind: np.ndarray, precip: np.ndarray, uv: np.ndarray,
+                    t_thresh: float, w_thresh: float, p_thresh: float,
+                    uv_thresh: float) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    Numeric anomaly scan over daily forecast arrays
+    
+    Args:
+        temps, wind, precip, uv: Daily average temperature, max wind, total precipitation and UV
+        t_thresh, w_thresh, p_thresh, uv_thresh: Temperature deviation, wind, precipitation and UV thresholds
+        
+    Returns:
+        Average temperature, and the day and check indices (into WeatherAPI.ANOMALY_CHECKS)
+        of every anomaly in day-then-check order
+    """
+    # Sequential Python sum, not NumPy's pairwise mean, so the average (and the
+    # deviations tested against it) match the original report to the last bit
+    avg_temp = float(sum(temps.tolist())) / len(temps)
+    
+    # One row per check, one column per day
+    flags = np.vstack((
+        np.abs(temps - avg_temp) > t_thresh,
+        wind > w_thresh,
+        precip > p_thresh,
+        uv > uv_thresh
+    ))
+    
+    # Walking the transpose keeps the day-by-day, check-by-check ordering
+    indices, checks = np.nonzero(flags.T)
+    return avg_temp, indices, checks
+
 class WeatherAPI:
     """Weather API client for fetching real-time weather data"""
     
+    # Retry policy for transient upstream failures
+    RETRY_TOTAL = 3
+    RETRY_BACKOFF = 0.3  # seconds, doubled on each attempt
+    RETRY_STATUSES = (502, 503, 504)
+    
+    # (type, severity, description) for each anomaly check, in report order
+    ANOMALY_CHECKS = (
+        ('Temperature Anomaly', 'medium',
+         lambda day, avg_temp: f"Temperature deviation: {day['avgtemp_c']:.1f}C (avg: {avg_temp:.1f}C)"),
+        ('High Wind Speed', 'high',
+         lambda day, avg_temp: f"Maximum wind speed: {day['maxwind_kph']:.0f} km/h"),
+        ('Heavy Precipitation', 'high',
+         lambda day, avg_temp: f"Total precipitation: {day['totalprecip_mm']:.1f} mm"),
+        ('Extreme UV Index', 'medium',
+         lambda day, avg_temp: f"UV Index: {day['uv']}")
+    )
+    
     def __init__(self):
         self.api_key = Config.WEATHERAPI_KEY
         self.base_url = Config.WEATHER_API_BASE_URL
+        # One pooled HTTP/2 client reused by every request; the API key rides along as a default param
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            params={'key': self.api_key},
+            timeout=httpx.Timeout(10, connect=3.05),
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=3,  # connection-level retries
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+            )
+        )
+    
+        # Short-lived response cache for payloads that change slowly (forecast, astronomy)
+        self._cache = TTLCache(maxsize=256, ttl=Config.CACHE_TTL)
+        self._cache_lock = Lock()
+    
+    def _get(self, url: str, params: Dict) -> Optional[httpx.Response]:
+        """GET with a short exponential backoff on transient gateway errors; None on an error status"""
+        for attempt in range(self.RETRY_TOTAL + 1):
+            response = self._client.get(url, params=params)
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.RETRY_TOTAL:
+                break
+            time.sleep(self.RETRY_BACKOFF * (2 ** attempt))
+        
+        if not response.is_success:
+            logger.warning("%s returned HTTP %s", url, response.status_code)
+            return None
+        
+        return response
+    
+    def _get_cached(self, url: str, params: Dict, transform: Callable[[Dict], Dict] = None) -> Optional[Dict]:
+        """Decoded (and optionally transformed) GET response, served from the TTL cache when fresh; failures are never cached"""
+        key = (url, tuple(sorted(params.items())))
+        with self._cache_lock:
+            data = self._cache.get(key)
+        
+        if data is None:
+            response = self._get(url, params)
+            if response is None:
+                return None
+            
+            data = orjson.loads(response.content)
+            if transform:
+                data = transform(data)
+            with self._cache_lock:
+                self._cache[key] = data
+        
+        return data
         
     def search_locations(self, query: str) -> List[Dict]:
         """
@@ -26,18 +165,16 @@ class WeatherAPI:
             List of matching locations
         """
         try:
-            url = f"{self.base_url}/search.json"
+            url = "/search.json"
             params = {
-                'key': self.api_key,
                 'q': query
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._get(url, params)
             
-            return response.json()
-        except Exception as e:
-            print(f"Error searching locations: {e}")
+            return orjson.loads(response.content) if response is not None else []
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.error("Error searching locations: %s", e)
             return []
     
     def get_current_weather(self, location: str) -> Optional[Dict]:
@@ -51,19 +188,17 @@ class WeatherAPI:
             Current weather data
         """
         try:
-            url = f"{self.base_url}/current.json"
+            url = "/current.json"
             params = {
-                'key': self.api_key,
                 'q': location,
                 'aqi': 'yes'  # Include air quality data
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            response = self._get(url, params)
             
-            return response.json()
-        except Exception as e:
-            print(f"Error fetching current weather: {e}")
+            return orjson.loads(response.content) if response is not None else None
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.error("Error fetching current weather: %s", e)
             return None
     
     def get_forecast(self, location: str, days: int = 7) -> Optional[Dict]:
@@ -78,21 +213,17 @@ class WeatherAPI:
             Forecast data
         """
         try:
-            url = f"{self.base_url}/forecast.json"
+            url = "/forecast.json"
             params = {
-                'key': self.api_key,
                 'q': location,
                 'days': min(days, 14),  # API supports up to 14 days
                 'aqi': 'yes',
                 'alerts': 'yes'
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            return response.json()
-        except Exception as e:
-            print(f"Error fetching forecast: {e}")
+            return self._get_cached(url, params, _prune_forecast)
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.error("Error fetching forecast: %s", e)
             return None
     
     def get_astronomy(self, location: str, date: str = None) -> Optional[Dict]:
@@ -107,21 +238,34 @@ class WeatherAPI:
             Astronomy data
         """
         try:
-            url = f"{self.base_url}/astronomy.json"
+            url = "/astronomy.json"
             params = {
-                'key': self.api_key,
                 'q': location,
                 'dt': date or datetime.now().strftime('%Y-%m-%d')
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            return response.json()
-        except Exception as e:
-            print(f"Error fetching astronomy data: {e}")
+            return self._get_cached(url, params)
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            logger.error("Error fetching astronomy data: %s", e)
             return None
     
+    def fetch_all(self, location: str, days: int = 7) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Fetch current weather and forecast concurrently
+        
+        Args:
+            location: Location name or coordinates
+            days: Number of forecast days (1-14)
+            
+        Returns:
+            Tuple of (current weather data, forecast data)
+        """
+        # Both requests share the pooled HTTP/2 connection, so wall time is the slower of the two
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            current = executor.submit(self.get_current_weather, location)
+            forecast = executor.submit(self.get_forecast, location, days)
+            return current.result(), forecast.result()
+    
     def analyze_weather_anomalies(self, forecast_data: Dict) -> List[Dict]:
         """
         Analyze weather data for anomalies
@@ -139,52 +283,37 @@ class WeatherAPI:
         
         try:
             forecast_days = forecast_data['forecast']['forecastday']
+            days = [day['day'] for day in forecast_days]
+            count = len(days)
             
-            # Calculate average temperature
-            temps = [day['day']['avgtemp_c'] for day in forecast_days]
-            avg_temp = sum(temps) / len(temps) if temps else 0
-            
-            for day in forecast_days:
-                day_data = day['day']
-                date = day['date']
-                
-                # Temperature anomalies
-                if abs(day_data['avgtemp_c'] - avg_temp) > Config.TEMP_ANOMALY_THRESHOLD:
-                    anomalies.append({
-                        'type': 'Temperature Anomaly',
-                        'date': date,
-                        'severity': 'medium',
-                        'description': f"Temperature deviation: {day_data['avgtemp_c']:.1f}C (avg: {avg_temp:.1f}C)"
-                    })
-                
-                # High wind speed
-                if day_data['maxwind_kph'] > Config.WIND_SPEED_ALERT:
-                    anomalies.append({
-                        'type': 'High Wind Speed',
-                        'date': date,
-                        'severity': 'high',
-                        'description': f"Maximum wind speed: {day_data['maxwind_kph']:.0f} km/h"
-                    })
-                
-                # Heavy precipitation
-                if day_data['totalprecip_mm'] > Config.PRECIPITATION_ALERT:
-                    anomalies.append({
-                        'type': 'Heavy Precipitation',
-                        'date': date,
-                        'severity': 'high',
-                        'description': f"Total precipitation: {day_data['totalprecip_mm']:.1f} mm"
-                    })
-                
-                # Extreme UV index
-                if day_data.get('uv', 0) > 8:
-                    anomalies.append({
-                        'type': 'Extreme UV Index',
-                        'date': date,
-                        'severity': 'medium',
-                        'description': f"UV Index: {day_data['uv']}"
-                    })
-        
-        except Exception as e:
-            print(f"Error analyzing anomalies: {e}")
+            if not count:
+                return anomalies
+            
+            temps = np.fromiter((day['avgtemp_c'] for day in days), dtype=float, count=count)
+            wind = np.fromiter((day['maxwind_kph'] for day in days), dtype=float, count=count)
+            precip = np.fromiter((day['totalprecip_mm'] for day in days), dtype=float, count=count)
+            uv = np.fromiter((day.get('uv', 0) for day in days), dtype=float, count=count)
+            
+            avg_temp, indices, checks = _scan_anomalies(
+                temps, wind, precip, uv,
+                Config.TEMP_ANOMALY_THRESHOLD,
+                Config.WIND_SPEED_ALERT,
+                Config.PRECIPITATION_ALERT,
+                Config.UV_INDEX_ALERT
+            )
+            
+            # Only the flagged days are turned back into dicts
+            anomalies = [
+                {
+                    'type': WeatherAPI.ANOMALY_CHECKS[check][0],
+                    'date': forecast_days[index]['date'],
+                    'severity': WeatherAPI.ANOMALY_CHECKS[check][1],
+                    'description': WeatherAPI.ANOMALY_CHECKS[check][2](days[index], avg_temp)
+                }
+                for index, check in zip(indices, checks)
+            ]
+        
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error("Error analyzing anomalies: %s", e)
         
         return anomalies